@@ -11,6 +11,8 @@ from typing import Set
 from typing import Tuple
 from typing import Union
 
+import numpy as np
+
 import optuna
 from optuna import distributions
 from optuna._typing import JSONSerializable
@@ -108,7 +110,13 @@ class _CachedStorage(BaseStorage, BaseHeartbeat):
         self._backend.set_study_system_attr(study_id, key, value)
 
     def get_study_id_from_name(self, study_name: str) -> int:
-        return self._backend.get_study_id_from_name(study_name)
+        study_id = self._backend.get_study_id_from_name(study_name)
+        with self._lock:
+            if study_id not in self._studies:
+                self._studies[study_id] = _StudyInfo()
+            # The name of a study never changes, so it is cached for `get_study_name_from_id`.
+            self._studies[study_id].name = study_name
+        return study_id
 
     def get_study_name_from_id(self, study_id: int) -> str:
         with self._lock:
@@ -178,6 +186,19 @@ class _CachedStorage(BaseStorage, BaseHeartbeat):
 
         return self._backend.get_trial_id_from_study_id_trial_number(study_id, trial_number)
 
+    def get_n_trials(
+        self, study_id: int, state: Optional[Union[Tuple[TrialState, ...], TrialState]] = None
+    ) -> int:
+        return self._backend.get_n_trials(study_id, state)
+
+    def get_param_values(
+        self,
+        study_id: int,
+        param_name: str,
+        states: Optional[Container[TrialState]] = None,
+    ) -> np.ndarray:
+        return self._backend.get_param_values(study_id, param_name, states)
+
     def get_best_trial(self, study_id: int) -> FrozenTrial:
         return self._backend.get_best_trial(study_id)
 
@@ -0,0 +1,23 @@
+"""Add index to study_id and state columns in trials table
+
+Revision ID: v3.6.0.a
+Revises: v3.2.0.a
+Create Date: 2026-10-15 15:12:41.218361
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "v3.6.0.a"
+down_revision = "v3.2.0.a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_trials_study_id_state", "trials", ["study_id", "state"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_trials_study_id_state", table_name="trials")
@@ -14,13 +14,13 @@ from sqlalchemy import Enum
 from sqlalchemy import Float
 from sqlalchemy import ForeignKey
 from sqlalchemy import func
+from sqlalchemy import Index
 from sqlalchemy import Integer
 from sqlalchemy import orm
 from sqlalchemy import String
 from sqlalchemy import Text
 from sqlalchemy import UniqueConstraint
 
-from optuna import distributions
 from optuna.study._study_direction import StudyDirection
 from optuna.trial import TrialState
 
@@ -54,6 +54,13 @@ FLOAT_PRECISION = 53
 BaseModel: Any = declarative_base()
 
 
+def _get_by_primary_key(session: orm.Session, model: Any, primary_key: int) -> Any:
+    if hasattr(session, "get"):
+        return session.get(model, primary_key)
+    # `Session.get` is not available in SQLAlchemy<1.4.
+    return session.query(model).get(primary_key)
+
+
 class StudyModel(BaseModel):
     __tablename__ = "studies"
     study_id = _Column(Integer, primary_key=True)
@@ -174,6 +181,9 @@ class StudySystemAttributeModel(BaseModel):
 
 class TrialModel(BaseModel):
     __tablename__ = "trials"
+    # Running trials of a study are looked up on every trial creation when the heartbeat is
+    # enabled, and trials are frequently filtered by state within a study.
+    __table_args__: Any = (Index("ix_trials_study_id_state", "study_id", "state"),)
     trial_id = _Column(Integer, primary_key=True)
     # No `UniqueConstraint` is put on the `number` columns although it in practice is constrained
     # to be unique. This is to reduce code complexity as table-level locking would be required
@@ -244,14 +254,16 @@ class TrialModel(BaseModel):
     def find_or_raise_by_id(
         cls, trial_id: int, session: orm.Session, for_update: bool = False
     ) -> "TrialModel":
-        query = session.query(cls).filter(cls.trial_id == trial_id)
-
-        # "FOR UPDATE" clause is used for row-level locking.
-        # Please note that SQLite3 doesn't support this clause.
         if for_update:
-            query = query.with_for_update()
-
-        trial = query.one_or_none()
+            # "FOR UPDATE" clause is used for row-level locking.
+            # Please note that SQLite3 doesn't support this clause.
+            trial = (
+                session.query(cls).filter(cls.trial_id == trial_id).with_for_update().one_or_none()
+            )
+        else:
+            # A trial that has already been loaded in this session, e.g., by a preceding setter
+            # in the same transaction, is taken from the identity map without a round trip.
+            trial = _get_by_primary_key(session, cls, trial_id)
         if trial is None:
             raise KeyError(NOT_FOUND_MSG)
 
@@ -356,28 +368,6 @@ class TrialParamModel(BaseModel):
         TrialModel, backref=orm.backref("params", cascade="all, delete-orphan")
     )
 
-    def check_and_add(self, session: orm.Session) -> None:
-        self._check_compatibility_with_previous_trial_param_distributions(session)
-        session.add(self)
-
-    def _check_compatibility_with_previous_trial_param_distributions(
-        self, session: orm.Session
-    ) -> None:
-        trial = TrialModel.find_or_raise_by_id(self.trial_id, session)
-
-        previous_record = (
-            session.query(TrialParamModel)
-            .join(TrialModel)
-            .filter(TrialModel.study_id == trial.study_id)
-            .filter(TrialParamModel.param_name == self.param_name)
-            .first()
-        )
-        if previous_record is not None:
-            distributions.check_distribution_compatibility(
-                distributions.json_to_distribution(previous_record.distribution_json),
-                distributions.json_to_distribution(self.distribution_json),
-            )
-
     @classmethod
     def find_by_trial_and_param_name(
         cls, trial: TrialModel, param_name: str, session: orm.Session
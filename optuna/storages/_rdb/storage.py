@@ -4,9 +4,12 @@ from collections import defaultdict
 from contextlib import contextmanager
 import copy
 from datetime import datetime
+import functools
 import json
 import logging
 import os
+import random
+import time
 from typing import Any
 from typing import Callable
 from typing import Container
@@ -17,8 +20,13 @@ from typing import List
 from typing import Optional
 from typing import Sequence
 from typing import Set
+from typing import Tuple
 from typing import TYPE_CHECKING
+from typing import Union
 import uuid
+import weakref
+
+import numpy as np
 
 import optuna
 from optuna import distributions
@@ -61,6 +69,9 @@ else:
 
 
 _logger = optuna.logging.get_logger(__name__)
+# A private generator so that the backoff jitter does not consume the global `random` sequence,
+# which users may have seeded.
+_retry_rng = random.Random()
 
 
 @contextmanager
@@ -96,6 +107,61 @@ def _create_scoped_session(
         session.close()
 
 
+def _create_upsert_statement(
+    session: "sqlalchemy_orm.Session",
+    model: Any,
+    values: Dict[str, Any],
+    conflict_columns: Sequence[str],
+) -> Optional["sqlalchemy.sql.Executable"]:
+    """Create an ``INSERT`` statement that updates the conflicting row if there is one.
+
+    :obj:`None` is returned if the dialect or the SQLAlchemy version does not support it. In that
+    case, callers should fall back to looking up the existing row before inserting or updating.
+    """
+
+    dialect = session.get_bind().dialect
+    update_columns = [c for c in values if c not in conflict_columns]
+    try:
+        if dialect.name == "sqlite":
+            # `ON CONFLICT` is supported since SQLite 3.24.0.
+            if dialect.server_version_info is None or dialect.server_version_info < (3, 24, 0):
+                return None
+            from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+            sqlite_statement = sqlite_insert(model.__table__).values(**values)
+            return sqlite_statement.on_conflict_do_update(
+                index_elements=conflict_columns,
+                set_={c: sqlite_statement.excluded[c] for c in update_columns},
+            )
+        elif dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+
+            postgresql_statement = postgresql_insert(model.__table__).values(**values)
+            return postgresql_statement.on_conflict_do_update(
+                index_elements=conflict_columns,
+                set_={c: postgresql_statement.excluded[c] for c in update_columns},
+            )
+        elif dialect.name == "mysql":
+            from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+            mysql_statement = mysql_insert(model.__table__).values(**values)
+            return mysql_statement.on_duplicate_key_update(
+                **{c: mysql_statement.inserted[c] for c in update_columns}
+            )
+    except ImportError:
+        # The SQLite dialect of SQLAlchemy<1.4 does not provide `insert`.
+        pass
+    return None
+
+
+def _create_tables(engine: "sqlalchemy.engine.Engine") -> None:
+    # `create_all` checks the existence of each table with a separate query, so the table names
+    # are listed at once and the creation is skipped if all the tables exist.
+    table_names = sqlalchemy.inspect(engine).get_table_names()
+    if not set(models.BaseModel.metadata.tables).issubset(table_names):
+        models.BaseModel.metadata.create_all(engine)
+
+
 class RDBStorage(BaseStorage, BaseHeartbeat):
     """Storage class for RDB backend.
 
@@ -171,6 +237,11 @@ class RDBStorage(BaseStorage, BaseHeartbeat):
         https://docs.sqlalchemy.org/en/13/core/engines.html#sqlalchemy.create_engine.params.
         pool_pre_ping
 
+    .. note::
+        If you use a file-based SQLite database with SQLAlchemy<2.0, ``poolclass`` will be set to
+        ``QueuePool`` by default to reuse connections across sessions, as SQLAlchemy>=2.0 does.
+        You can override it with ``engine_kwargs['poolclass']``.
+
     .. note::
         We would never recommend SQLite3 for parallel optimization.
         Please see the FAQ :ref:`sqlite_concurrency` for details.
@@ -212,8 +283,12 @@ class RDBStorage(BaseStorage, BaseHeartbeat):
         self.heartbeat_interval = heartbeat_interval
         self.grace_period = grace_period
         self.failed_trial_callback = failed_trial_callback
+        # The same distribution is typically stored for a parameter in many trials, and trials
+        # are read over and over again, so each distinct JSON is decoded only once per storage.
+        self._distribution_cache: Dict[str, distributions.BaseDistribution] = {}
 
         self._set_default_engine_kwargs_for_mysql(url, self.engine_kwargs)
+        self._set_default_engine_kwargs_for_sqlite(self.url, self.engine_kwargs)
 
         try:
             self.engine = sqlalchemy.engine.create_engine(self.url, **self.engine_kwargs)
@@ -226,8 +301,11 @@ class RDBStorage(BaseStorage, BaseHeartbeat):
         self.scoped_session = sqlalchemy_orm.scoped_session(
             sqlalchemy_orm.sessionmaker(bind=self.engine)
         )
+        # The engine is part of reference cycles and would otherwise keep its pooled connections
+        # open until the cyclic garbage collector runs, so they are released with the storage.
+        weakref.finalize(self, self.engine.dispose)
         if not skip_table_creation:
-            models.BaseModel.metadata.create_all(self.engine)
+            _create_tables(self.engine)
 
         self._version_manager = _VersionManager(self.url, self.engine, self.scoped_session)
         if not skip_compatibility_check:
@@ -238,10 +316,12 @@ class RDBStorage(BaseStorage, BaseHeartbeat):
         del state["scoped_session"]
         del state["engine"]
         del state["_version_manager"]
+        del state["_distribution_cache"]
         return state
 
     def __setstate__(self, state: Dict[Any, Any]) -> None:
         self.__dict__.update(state)
+        self._distribution_cache = {}
         try:
             self.engine = sqlalchemy.engine.create_engine(self.url, **self.engine_kwargs)
         except ImportError as e:
@@ -253,7 +333,8 @@ class RDBStorage(BaseStorage, BaseHeartbeat):
         self.scoped_session = sqlalchemy_orm.scoped_session(
             sqlalchemy_orm.sessionmaker(bind=self.engine)
         )
-        models.BaseModel.metadata.create_all(self.engine)
+        weakref.finalize(self, self.engine.dispose)
+        _create_tables(self.engine)
         self._version_manager = _VersionManager(self.url, self.engine, self.scoped_session)
         if not self.skip_compatibility_check:
             self._version_manager.check_table_schema_compatibility()
@@ -261,46 +342,52 @@ class RDBStorage(BaseStorage, BaseHeartbeat):
     def create_new_study(
         self, directions: Sequence[StudyDirection], study_name: Optional[str] = None
     ) -> int:
-        try:
-            with _create_scoped_session(self.scoped_session) as session:
-                if study_name is None:
-                    study_name = self._create_unique_study_name(session)
-
-                direction_models = [
-                    models.StudyDirectionModel(objective=objective, direction=d)
-                    for objective, d in enumerate(list(directions))
-                ]
+        # A generated name is not looked up in advance. The unique constraint on the study name
+        # is relied upon instead, and another name is generated on the unlikely collision.
+        generate_study_name = study_name is None
+        n_retries = 0
+        while True:
+            if generate_study_name:
+                study_name = DEFAULT_STUDY_NAME_PREFIX + str(uuid.uuid4())
 
-                session.add(models.StudyModel(study_name=study_name, directions=direction_models))
+            try:
+                with _create_scoped_session(self.scoped_session) as session:
+                    direction_models = [
+                        models.StudyDirectionModel(objective=objective, direction=d)
+                        for objective, d in enumerate(list(directions))
+                    ]
+
+                    study = models.StudyModel(study_name=study_name, directions=direction_models)
+                    session.add(study)
+                    # Flush to obtain the ID of the new study within this session.
+                    session.flush()
+                    study_id = study.study_id
+                break
 
-        except sqlalchemy_exc.IntegrityError:
-            raise optuna.exceptions.DuplicatedStudyError(
-                "Another study with name '{}' already exists. "
-                "Please specify a different name, or reuse the existing one "
-                "by setting `load_if_exists` (for Python API) or "
-                "`--skip-if-exists` flag (for CLI).".format(study_name)
-            )
+            except sqlalchemy_exc.IntegrityError:
+                if generate_study_name:
+                    # Retry a couple of times only, since the error may be caused by something
+                    # other than a name collision, which no other name would resolve.
+                    if n_retries > 2:
+                        raise
+                    n_retries += 1
+                    continue
+                raise optuna.exceptions.DuplicatedStudyError(
+                    "Another study with name '{}' already exists. "
+                    "Please specify a different name, or reuse the existing one "
+                    "by setting `load_if_exists` (for Python API) or "
+                    "`--skip-if-exists` flag (for CLI).".format(study_name)
+                )
 
         _logger.info("A new study created in RDB with name: {}".format(study_name))
 
-        return self.get_study_id_from_name(study_name)
+        return study_id
 
     def delete_study(self, study_id: int) -> None:
         with _create_scoped_session(self.scoped_session, True) as session:
             study = models.StudyModel.find_or_raise_by_id(study_id, session)
             session.delete(study)
 
-    @staticmethod
-    def _create_unique_study_name(session: "sqlalchemy_orm.Session") -> str:
-        while True:
-            study_uuid = str(uuid.uuid4())
-            study_name = DEFAULT_STUDY_NAME_PREFIX + study_uuid
-            study = models.StudyModel.find_by_name(study_name, session)
-            if study is None:
-                break
-
-        return study_name
-
     def set_study_user_attr(self, study_id: int, key: str, value: Any) -> None:
         with _create_scoped_session(self.scoped_session, True) as session:
             study = models.StudyModel.find_or_raise_by_id(study_id, session)
@@ -462,6 +549,11 @@ class RDBStorage(BaseStorage, BaseHeartbeat):
                     if n_retries > 2:
                         raise
 
+                    # The failed transaction has to be discarded before retrying. Back off with
+                    # jitter so that workers contending for the same study do not collide again.
+                    session.rollback()
+                    time.sleep(_retry_rng.uniform(0, 0.2 * 2**n_retries))
+
                 n_retries += 1
 
             if template_trial:
@@ -533,18 +625,24 @@ class RDBStorage(BaseStorage, BaseHeartbeat):
                     session, trial.trial_id, 0, template_trial.value
                 )
 
-            for param_name, param_value in template_trial.params.items():
-                distribution = template_trial.distributions[param_name]
-                param_value_in_internal_repr = distribution.to_internal_repr(param_value)
-                self._set_trial_param_without_commit(
-                    session, trial.trial_id, param_name, param_value_in_internal_repr, distribution
-                )
-
-            for key, value in template_trial.user_attrs.items():
-                self._set_trial_user_attr_without_commit(session, trial.trial_id, key, value)
+            self._add_new_trial_params_without_commit(
+                session, trial, template_trial.params, template_trial.distributions
+            )
 
-            for key, value in template_trial.system_attrs.items():
-                self._set_trial_system_attr_without_commit(session, trial.trial_id, key, value)
+            # The trial has just been created and has no attributes yet, so the attributes are
+            # inserted directly instead of being looked up and updated one key at a time.
+            session.add_all(
+                models.TrialUserAttributeModel(
+                    trial_id=trial.trial_id, key=key, value_json=json.dumps(value)
+                )
+                for key, value in template_trial.user_attrs.items()
+            )
+            session.add_all(
+                models.TrialSystemAttributeModel(
+                    trial_id=trial.trial_id, key=key, value_json=json.dumps(value)
+                )
+                for key, value in template_trial.system_attrs.items()
+            )
 
             for step, intermediate_value in template_trial.intermediate_values.items():
                 self._set_trial_intermediate_value_without_commit(
@@ -581,27 +679,97 @@ class RDBStorage(BaseStorage, BaseHeartbeat):
         trial = models.TrialModel.find_or_raise_by_id(trial_id, session)
         self.check_trial_is_updatable(trial_id, trial.state)
 
+        distribution_json = distributions.distribution_to_json(distribution)
+
+        upsert = _create_upsert_statement(
+            session,
+            models.TrialParamModel,
+            {
+                "trial_id": trial_id,
+                "param_name": param_name,
+                "param_value": param_value_internal,
+                "distribution_json": distribution_json,
+            },
+            ("trial_id", "param_name"),
+        )
+        # Raise error in case distribution is incompatible. The check also covers the param this
+        # trial may already have, so the existing param does not need to be looked up for it.
+        self._check_param_distribution_compatibility_in_study(
+            session, trial.study_id, param_name, distribution, distribution_json
+        )
+
+        if upsert is not None:
+            session.execute(upsert)
+            return
+
         trial_param = models.TrialParamModel.find_by_trial_and_param_name(
             trial, param_name, session
         )
 
         if trial_param is not None:
-            # Raise error in case distribution is incompatible.
-            distributions.check_distribution_compatibility(
-                distributions.json_to_distribution(trial_param.distribution_json), distribution
-            )
-
             trial_param.param_value = param_value_internal
-            trial_param.distribution_json = distributions.distribution_to_json(distribution)
+            trial_param.distribution_json = distribution_json
         else:
             trial_param = models.TrialParamModel(
                 trial_id=trial_id,
                 param_name=param_name,
                 param_value=param_value_internal,
-                distribution_json=distributions.distribution_to_json(distribution),
+                distribution_json=distribution_json,
             )
+            session.add(trial_param)
 
-            trial_param.check_and_add(session)
+    def _add_new_trial_params_without_commit(
+        self,
+        session: "sqlalchemy_orm.Session",
+        trial: "models.TrialModel",
+        params: Dict[str, Any],
+        param_distributions: Dict[str, distributions.BaseDistribution],
+    ) -> None:
+        # The trial has just been created and has no params yet, so the params are only checked
+        # against the study and then inserted in a batch, instead of going through
+        # `_set_trial_param_without_commit` one param at a time.
+        trial_params = []
+        for param_name, param_value in params.items():
+            distribution = param_distributions[param_name]
+            distribution_json = distributions.distribution_to_json(distribution)
+            self._check_param_distribution_compatibility_in_study(
+                session, trial.study_id, param_name, distribution, distribution_json
+            )
+            trial_params.append(
+                models.TrialParamModel(
+                    trial_id=trial.trial_id,
+                    param_name=param_name,
+                    param_value=distribution.to_internal_repr(param_value),
+                    distribution_json=distribution_json,
+                )
+            )
+        session.add_all(trial_params)
+
+    @staticmethod
+    def _check_param_distribution_compatibility_in_study(
+        session: "sqlalchemy_orm.Session",
+        study_id: int,
+        param_name: str,
+        distribution: distributions.BaseDistribution,
+        distribution_json: str,
+    ) -> None:
+        # Distributions of a param in a study are mutually compatible, so checking against any
+        # one of them is enough and the lookup can stop at the first match.
+        previous_distribution_json = (
+            session.query(models.TrialParamModel.distribution_json)
+            .join(models.TrialModel)
+            .filter(models.TrialModel.study_id == study_id)
+            .filter(models.TrialParamModel.param_name == param_name)
+            .limit(1)
+            .scalar()
+        )
+        if (
+            previous_distribution_json is not None
+            and previous_distribution_json != distribution_json
+        ):
+            distributions.check_distribution_compatibility(
+                distributions.json_to_distribution(previous_distribution_json), distribution
+            )
 
     def _check_and_set_param_distribution(
         self,
@@ -617,12 +785,18 @@ class RDBStorage(BaseStorage, BaseHeartbeat):
             # Assume that study exists.
             models.StudyModel.find_or_raise_by_id(study_id, session, for_update=True)
 
-            models.TrialParamModel(
-                trial_id=trial_id,
-                param_name=param_name,
-                param_value=param_value_internal,
-                distribution_json=distributions.distribution_to_json(distribution),
-            ).check_and_add(session)
+            distribution_json = distributions.distribution_to_json(distribution)
+            self._check_param_distribution_compatibility_in_study(
+                session, study_id, param_name, distribution, distribution_json
+            )
+            session.add(
+                models.TrialParamModel(
+                    trial_id=trial_id,
+                    param_name=param_name,
+                    param_value=param_value_internal,
+                    distribution_json=distribution_json,
+                )
+            )
 
     def get_trial_param(self, trial_id: int, param_name: str) -> float:
         with _create_scoped_session(self.scoped_session) as session:
@@ -701,6 +875,21 @@ class RDBStorage(BaseStorage, BaseHeartbeat):
         ) = models.TrialIntermediateValueModel.intermediate_value_to_stored_repr(
             intermediate_value
         )
+        upsert = _create_upsert_statement(
+            session,
+            models.TrialIntermediateValueModel,
+            {
+                "trial_id": trial_id,
+                "step": step,
+                "intermediate_value": stored_value,
+                "intermediate_value_type": value_type,
+            },
+            ("trial_id", "step"),
+        )
+        if upsert is not None:
+            session.execute(upsert)
+            return
+
         trial_intermediate_value = models.TrialIntermediateValueModel.find_by_trial_and_step(
             trial, step, session
         )
@@ -774,8 +963,10 @@ class RDBStorage(BaseStorage, BaseHeartbeat):
 
     def get_trial(self, trial_id: int) -> FrozenTrial:
         with _create_scoped_session(self.scoped_session) as session:
-            trial_model = models.TrialModel.find_or_raise_by_id(trial_id, session)
-            frozen_trial = self._build_frozen_trial_from_trial_model(trial_model)
+            trials = self._build_frozen_trials(session, [models.TrialModel.trial_id == trial_id])
+            if len(trials) == 0:
+                raise KeyError(models.NOT_FOUND_MSG)
+            frozen_trial = trials[0]
 
         return frozen_trial
 
@@ -789,6 +980,68 @@ class RDBStorage(BaseStorage, BaseHeartbeat):
 
         return copy.deepcopy(trials) if deepcopy else trials
 
+    def get_n_trials(
+        self, study_id: int, state: Optional[Union[Tuple[TrialState, ...], TrialState]] = None
+    ) -> int:
+        if isinstance(state, TrialState):
+            state = (state,)
+
+        with _create_scoped_session(self.scoped_session) as session:
+            # Ensure that the study exists.
+            models.StudyModel.find_or_raise_by_id(study_id, session)
+
+            # Count in the database rather than building every trial just to take its length.
+            query = session.query(
+                sqlalchemy_sql_functions.count(models.TrialModel.trial_id)
+            ).filter(models.TrialModel.study_id == study_id)
+            if state is not None:
+                query = query.filter(models.TrialModel.state.in_(state))
+            n_trials = query.scalar()
+
+        return n_trials
+
+    def get_param_values(
+        self,
+        study_id: int,
+        param_name: str,
+        states: Optional[Container[TrialState]] = None,
+    ) -> np.ndarray:
+        """Return the values of a parameter across the trials of a study.
+
+        Args:
+            study_id:
+                ID of the study.
+            param_name:
+                Name of the parameter.
+            states:
+                Trial states to filter on. If :obj:`None`, include all states.
+
+        Returns:
+            A float64 array of the internal representations of the parameter, ordered by
+            trial ID. Trials that do not have the parameter are skipped.
+
+        Raises:
+            :exc:`KeyError`:
+                If no study with the matching ``study_id`` exists.
+        """
+
+        with _create_scoped_session(self.scoped_session) as session:
+            # Ensure that the study exists.
+            models.StudyModel.find_or_raise_by_id(study_id, session)
+
+            query = (
+                session.query(models.TrialParamModel.param_value)
+                .join(models.TrialModel)
+                .filter(models.TrialModel.study_id == study_id)
+                .filter(models.TrialParamModel.param_name == param_name)
+            )
+            if states is not None:
+                assert isinstance(states, Iterable)
+                query = query.filter(models.TrialModel.state.in_(states))
+            rows = query.order_by(models.TrialModel.trial_id).all()
+
+        return np.fromiter((row[0] for row in rows), dtype=np.float64, count=len(rows))
+
     def _get_trials(
         self,
         study_id: int,
@@ -798,112 +1051,201 @@ class RDBStorage(BaseStorage, BaseHeartbeat):
         with _create_scoped_session(self.scoped_session) as session:
             # Ensure that the study exists.
             models.StudyModel.find_or_raise_by_id(study_id, session)
-            query = session.query(models.TrialModel.trial_id).filter(
-                models.TrialModel.study_id == study_id
-            )
 
+            criteria = [models.TrialModel.study_id == study_id]
             if states is not None:
                 # This assertion is for type checkers, since `states` is required to be Container
                 # in the base class while `models.TrialModel.state.in_` requires Iterable.
                 assert isinstance(states, Iterable)
-                query = query.filter(models.TrialModel.state.in_(states))
-
-            trial_ids = query.all()
 
-            trial_ids = set(
-                trial_id_tuple[0]
-                for trial_id_tuple in trial_ids
-                if trial_id_tuple[0] not in excluded_trial_ids
-            )
-            try:
-                trial_models = (
-                    session.query(models.TrialModel)
-                    .options(sqlalchemy_orm.selectinload(models.TrialModel.params))
-                    .options(sqlalchemy_orm.selectinload(models.TrialModel.values))
-                    .options(sqlalchemy_orm.selectinload(models.TrialModel.user_attributes))
-                    .options(sqlalchemy_orm.selectinload(models.TrialModel.system_attributes))
-                    .options(sqlalchemy_orm.selectinload(models.TrialModel.intermediate_values))
-                    .filter(
-                        models.TrialModel.trial_id.in_(trial_ids),
-                        models.TrialModel.study_id == study_id,
-                    )
-                    .order_by(models.TrialModel.trial_id)
-                    .all()
-                )
-            except sqlalchemy_exc.OperationalError as e:
-                # Likely exceeding the number of maximum allowed variables using IN.
-                # This number differ between database dialects. For SQLite for instance, see
-                # https://www.sqlite.org/limits.html and the section describing
-                # SQLITE_MAX_VARIABLE_NUMBER.
-
-                _logger.warning(
-                    "Caught an error from sqlalchemy: {}. Falling back to a slower alternative. "
-                    "".format(str(e))
+            if not excluded_trial_ids:
+                # Nothing to exclude, so the trials can be fetched without first collecting their
+                # IDs, which saves a round trip and avoids a potentially large IN clause.
+                trials = self._build_frozen_trials(session, criteria, states)
+            else:
+                trials = self._get_frozen_trials_excluding(
+                    session, criteria, states, excluded_trial_ids
                 )
 
-                trial_models = (
-                    session.query(models.TrialModel)
-                    .options(sqlalchemy_orm.selectinload(models.TrialModel.params))
-                    .options(sqlalchemy_orm.selectinload(models.TrialModel.values))
-                    .options(sqlalchemy_orm.selectinload(models.TrialModel.user_attributes))
-                    .options(sqlalchemy_orm.selectinload(models.TrialModel.system_attributes))
-                    .options(sqlalchemy_orm.selectinload(models.TrialModel.intermediate_values))
-                    .filter(models.TrialModel.study_id == study_id)
-                    .order_by(models.TrialModel.trial_id)
-                    .all()
-                )
-                trial_models = [t for t in trial_models if t.trial_id in trial_ids]
+        return trials
+
+    def _get_frozen_trials_excluding(
+        self,
+        session: "sqlalchemy_orm.Session",
+        criteria: List["sqlalchemy.sql.ColumnElement"],
+        states: Optional[Iterable[TrialState]],
+        excluded_trial_ids: Set[int],
+    ) -> List[FrozenTrial]:
+        query = session.query(models.TrialModel.trial_id).filter(*criteria)
+        if states is not None:
+            query = query.filter(models.TrialModel.state.in_(states))
+        trial_ids = query.all()
+
+        trial_ids = set(
+            trial_id_tuple[0]
+            for trial_id_tuple in trial_ids
+            if trial_id_tuple[0] not in excluded_trial_ids
+        )
+        try:
+            trials = self._build_frozen_trials(
+                session, criteria + [models.TrialModel.trial_id.in_(trial_ids)], states
+            )
+        except sqlalchemy_exc.OperationalError as e:
+            # Likely exceeding the number of maximum allowed variables using IN.
+            # This number differ between database dialects. For SQLite for instance, see
+            # https://www.sqlite.org/limits.html and the section describing
+            # SQLITE_MAX_VARIABLE_NUMBER.
+
+            _logger.warning(
+                "Caught an error from sqlalchemy: {}. Falling back to a slower alternative. "
+                "".format(str(e))
+            )
 
-            trials = [self._build_frozen_trial_from_trial_model(trial) for trial in trial_models]
+            trials = self._build_frozen_trials(session, criteria, states)
+            trials = [t for t in trials if t._trial_id in trial_ids]
 
         return trials
 
-    def _build_frozen_trial_from_trial_model(self, trial: "models.TrialModel") -> FrozenTrial:
-        values: Optional[List[float]]
-        if trial.values:
-            values = [0 for _ in trial.values]
-            for value_model in trial.values:
-                values[value_model.objective] = TrialValueModel.stored_repr_to_value(
-                    value_model.value, value_model.value_type
-                )
-        else:
-            values = None
-
-        params = sorted(trial.params, key=lambda p: p.param_id)
-
-        return FrozenTrial(
-            number=trial.number,
-            state=trial.state,
-            value=None,
-            values=values,
-            datetime_start=trial.datetime_start,
-            datetime_complete=trial.datetime_complete,
-            params={
-                p.param_name: distributions.json_to_distribution(
-                    p.distribution_json
-                ).to_external_repr(p.param_value)
-                for p in params
-            },
-            distributions={
-                p.param_name: distributions.json_to_distribution(p.distribution_json)
-                for p in params
-            },
-            user_attrs={attr.key: json.loads(attr.value_json) for attr in trial.user_attributes},
-            system_attrs={
-                attr.key: json.loads(attr.value_json) for attr in trial.system_attributes
-            },
-            intermediate_values={
-                v.step: models.TrialIntermediateValueModel.stored_repr_to_intermediate_value(
-                    v.intermediate_value, v.intermediate_value_type
-                )
-                for v in trial.intermediate_values
-            },
-            trial_id=trial.trial_id,
+    def _build_frozen_trials(
+        self,
+        session: "sqlalchemy_orm.Session",
+        criteria: List["sqlalchemy.sql.ColumnElement"],
+        states: Optional[Iterable[TrialState]] = None,
+    ) -> List[FrozenTrial]:
+        # Trials and their child records are read as plain rows rather than ORM instances. The
+        # rows are only used to build `FrozenTrial`s, so the identity map and attribute
+        # instrumentation of the ORM would be pure overhead, which is significant for large
+        # studies. For the same reason, the statements are executed on the underlying connection
+        # so that the rows bypass the ORM's result processing as well.
+        def fetch_rows(query: "sqlalchemy_orm.Query") -> Sequence[Any]:
+            return session.connection().execute(query.statement).fetchall()
+
+        trial_query = session.query(
+            models.TrialModel.trial_id,
+            models.TrialModel.number,
+            models.TrialModel.state,
+            models.TrialModel.datetime_start,
+            models.TrialModel.datetime_complete,
+        ).filter(*criteria)
+        if states is not None:
+            trial_query = trial_query.filter(models.TrialModel.state.in_(states))
+        trial_rows = fetch_rows(trial_query.order_by(models.TrialModel.trial_id))
+        if len(trial_rows) == 0:
+            return []
+
+        # The state filter is not applied to the child records again. A trial may change its state
+        # after the trial rows above have been read, and filtering on the new state would silently
+        # drop its children. The children are instead restricted to the range of the fetched
+        # trial IDs, and those of trials outside `trial_rows` are simply left unused.
+        min_trial_id = trial_rows[0][0]
+        max_trial_id = trial_rows[-1][0]
+
+        def fetch_child_rows(*columns: Any, order_by: Any = None) -> Sequence[Any]:
+            # The first column must be the `trial_id` column of the child table.
+            query = (
+                session.query(*columns)
+                .join(models.TrialModel, models.TrialModel.trial_id == columns[0])
+                .filter(*criteria)
+                .filter(columns[0].between(min_trial_id, max_trial_id))
+            )
+            if order_by is not None:
+                query = query.order_by(order_by)
+            return fetch_rows(query)
+
+        param_rows = fetch_child_rows(
+            models.TrialParamModel.trial_id,
+            models.TrialParamModel.param_name,
+            models.TrialParamModel.param_value,
+            models.TrialParamModel.distribution_json,
+            order_by=models.TrialParamModel.param_id,
         )
+        value_rows = fetch_child_rows(
+            models.TrialValueModel.trial_id,
+            models.TrialValueModel.value,
+            models.TrialValueModel.value_type,
+            order_by=models.TrialValueModel.objective,
+        )
+        user_attr_rows = fetch_child_rows(
+            models.TrialUserAttributeModel.trial_id,
+            models.TrialUserAttributeModel.key,
+            models.TrialUserAttributeModel.value_json,
+        )
+        system_attr_rows = fetch_child_rows(
+            models.TrialSystemAttributeModel.trial_id,
+            models.TrialSystemAttributeModel.key,
+            models.TrialSystemAttributeModel.value_json,
+        )
+        intermediate_value_rows = fetch_child_rows(
+            models.TrialIntermediateValueModel.trial_id,
+            models.TrialIntermediateValueModel.step,
+            models.TrialIntermediateValueModel.intermediate_value,
+            models.TrialIntermediateValueModel.intermediate_value_type,
+        )
+
+        # The loops below run once per row, so functions and methods are bound to local names in
+        # advance to save the repeated attribute lookups.
+        json_loads = json.loads
+
+        params: Dict[int, Dict[str, Any]] = defaultdict(dict)
+        param_distributions: Dict[int, Dict[str, distributions.BaseDistribution]] = defaultdict(
+            dict
+        )
+        distribution_cache = self._distribution_cache
+        get_distribution = distribution_cache.get
+        for trial_id, param_name, param_value, distribution_json in param_rows:
+            distribution = get_distribution(distribution_json)
+            if distribution is None:
+                distribution = distributions.json_to_distribution(distribution_json)
+                distribution_cache[distribution_json] = distribution
+            params[trial_id][param_name] = distribution.to_external_repr(param_value)
+            param_distributions[trial_id][param_name] = distribution
+
+        values: Dict[int, List[float]] = defaultdict(list)
+        to_value = TrialValueModel.stored_repr_to_value
+        for trial_id, value, value_type in value_rows:
+            values[trial_id].append(to_value(value, value_type))
+
+        user_attrs: Dict[int, Dict[str, Any]] = defaultdict(dict)
+        for trial_id, key, value_json in user_attr_rows:
+            user_attrs[trial_id][key] = json_loads(value_json)
+
+        system_attrs: Dict[int, Dict[str, Any]] = defaultdict(dict)
+        for trial_id, key, value_json in system_attr_rows:
+            system_attrs[trial_id][key] = json_loads(value_json)
+
+        intermediate_values: Dict[int, Dict[int, float]] = defaultdict(dict)
+        to_intermediate_value = (
+            models.TrialIntermediateValueModel.stored_repr_to_intermediate_value
+        )
+        for trial_id, step, intermediate_value, intermediate_value_type in intermediate_value_rows:
+            intermediate_values[trial_id][step] = to_intermediate_value(
+                intermediate_value, intermediate_value_type
+            )
+
+        return [
+            FrozenTrial(
+                number=number,
+                state=state,
+                value=None,
+                values=values.get(trial_id),
+                datetime_start=datetime_start,
+                datetime_complete=datetime_complete,
+                params=params[trial_id],
+                distributions=param_distributions[trial_id],
+                user_attrs=user_attrs[trial_id],
+                system_attrs=system_attrs[trial_id],
+                intermediate_values=intermediate_values[trial_id],
+                trial_id=trial_id,
+            )
+            for trial_id, number, state, datetime_start, datetime_complete in trial_rows
+        ]
 
     def get_best_trial(self, study_id: int) -> FrozenTrial:
         with _create_scoped_session(self.scoped_session) as session:
-            _directions = self.get_study_directions(study_id)
+            # The directions and the best trial are read within this session instead of calling
+            # `get_study_directions` and `get_trial`, each of which would use a session of its own.
+            study = models.StudyModel.find_or_raise_by_id(study_id, session)
+            _directions = [d.direction for d in study.directions]
             if len(_directions) > 1:
                 raise RuntimeError(
                     "Best trial can be obtained only for single-objective optimization."
@@ -914,9 +1256,11 @@ class RDBStorage(BaseStorage, BaseHeartbeat):
                 trial = models.TrialModel.find_max_value_trial(study_id, 0, session)
             else:
                 trial = models.TrialModel.find_min_value_trial(study_id, 0, session)
-            trial_id = trial.trial_id
+            frozen_trial = self._build_frozen_trials(
+                session, [models.TrialModel.trial_id == trial.trial_id]
+            )[0]
 
-        return self.get_trial(trial_id)
+        return frozen_trial
 
     @staticmethod
     def _set_default_engine_kwargs_for_mysql(url: str, engine_kwargs: Dict[str, Any]) -> None:
@@ -935,6 +1279,35 @@ class RDBStorage(BaseStorage, BaseHeartbeat):
         engine_kwargs["pool_pre_ping"] = True
         _logger.debug("pool_pre_ping=True was set to engine_kwargs to prevent connection timeout.")
 
+    @staticmethod
+    def _set_default_engine_kwargs_for_sqlite(url: str, engine_kwargs: Dict[str, Any]) -> None:
+        # Skip if RDB is not SQLite.
+        if not url.startswith("sqlite"):
+            return
+
+        # Do not overwrite value.
+        if "poolclass" in engine_kwargs:
+            return
+
+        # SQLAlchemy<2.0 uses `NullPool` for file-based SQLite databases, i.e., a new connection
+        # is opened and the schema is loaded again for every session. Pool the connections as
+        # SQLAlchemy>=2.0 does by default. See
+        # https://docs.sqlalchemy.org/en/20/changelog/migration_20.html#the-sqlite-dialect-uses-queuepool-for-file-based-databases
+        sqlalchemy_url = sqlalchemy.engine.url.make_url(url)
+        dialect = sqlalchemy_url.get_dialect()
+        pool_class = dialect.get_pool_class(sqlalchemy_url)  # type: ignore[attr-defined]
+        if pool_class is not sqlalchemy.pool.NullPool:
+            return
+
+        engine_kwargs["poolclass"] = sqlalchemy.pool.QueuePool
+        # A pooled connection may be checked out by a thread other than the one that created it,
+        # while it is never used by two threads at the same time.
+        engine_kwargs["connect_args"] = {
+            "check_same_thread": False,
+            **engine_kwargs.get("connect_args", {}),
+        }
+        _logger.debug("poolclass=QueuePool was set to engine_kwargs to reuse SQLite connections.")
+
     @staticmethod
     def _fill_storage_url_template(template: str) -> str:
         return template.format(SCHEMA_VERSION=models.SCHEMA_VERSION)
@@ -1077,6 +1450,11 @@ class _VersionManager:
                 context.stamp(script, revision)
 
     def check_table_schema_compatibility(self) -> None:
+        current_version = self.get_current_version()
+        head_version = self.get_head_version()
+        if current_version == head_version:
+            return
+
         with _create_scoped_session(self.scoped_session) as session:
             # NOTE: After invocation of `_init_version_info_model` method,
             #       it is ensured that a `VersionInfoModel` entry exists.
@@ -1084,11 +1462,6 @@ class _VersionManager:
 
             assert version_info is not None
 
-            current_version = self.get_current_version()
-            head_version = self.get_head_version()
-            if current_version == head_version:
-                return
-
             message = (
                 "The runtime optuna version {} is no longer compatible with the table schema "
                 "(set up by optuna {}). ".format(version.__version__, version_info.library_version)
@@ -1152,17 +1525,27 @@ class _VersionManager:
             return version_info.schema_version == models.SCHEMA_VERSION
 
     def _create_alembic_script(self) -> "alembic_script.ScriptDirectory":
-        config = self._create_alembic_config()
-        script = alembic_script.ScriptDirectory.from_config(config)
-        return script
+        return _get_alembic_script()
 
     def _create_alembic_config(self) -> "alembic_config.Config":
-        alembic_dir = os.path.join(os.path.dirname(__file__), "alembic")
+        return _create_alembic_config(self.url)
+
+
+def _create_alembic_config(url: Optional[str] = None) -> "alembic_config.Config":
+    alembic_dir = os.path.join(os.path.dirname(__file__), "alembic")
+
+    config = alembic_config.Config(os.path.join(os.path.dirname(__file__), "alembic.ini"))
+    config.set_main_option("script_location", escape_alembic_config_value(alembic_dir))
+    if url is not None:
+        config.set_main_option("sqlalchemy.url", escape_alembic_config_value(url))
+    return config
+
 
-        config = alembic_config.Config(os.path.join(os.path.dirname(__file__), "alembic.ini"))
-        config.set_main_option("script_location", escape_alembic_config_value(alembic_dir))
-        config.set_main_option("sqlalchemy.url", escape_alembic_config_value(self.url))
-        return config
+@functools.lru_cache(maxsize=1)
+def _get_alembic_script() -> "alembic_script.ScriptDirectory":
+    # Building the revision map parses every migration script. The scripts are shipped with
+    # the package and do not depend on the storage URL, so the result is shared by all storages.
+    return alembic_script.ScriptDirectory.from_config(_create_alembic_config())
 
 
 def escape_alembic_config_value(value: str) -> str:
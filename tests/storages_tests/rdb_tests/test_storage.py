@@ -1,5 +1,7 @@
+import math
 import os
 import platform
+import random
 import shutil
 import sys
 import tempfile
@@ -7,10 +9,18 @@ from typing import Any
 from typing import Dict
 from typing import Optional
 from unittest.mock import patch
+import uuid
 import warnings
 
+import numpy as np
 import pytest
+from sqlalchemy import event
+from sqlalchemy.dialects.sqlite.pysqlite import SQLiteDialect_pysqlite
+from sqlalchemy.engine import Engine
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import QueuePool
 
 import optuna
 from optuna import create_study
@@ -18,11 +28,16 @@ from optuna import load_study
 from optuna.distributions import CategoricalDistribution
 from optuna.distributions import FloatDistribution
 from optuna.distributions import IntDistribution
+from optuna.distributions import json_to_distribution
 from optuna.storages import RDBStorage
+from optuna.storages._base import DEFAULT_STUDY_NAME_PREFIX
+from optuna.storages._rdb.models import BaseModel
 from optuna.storages._rdb.models import SCHEMA_VERSION
 from optuna.storages._rdb.models import VersionInfoModel
 from optuna.storages._rdb.storage import _create_scoped_session
+from optuna.study import StudyDirection
 from optuna.testing.tempfile_pool import NamedTemporaryFilePool
+from optuna.trial import TrialState
 
 from .create_db import mo_objective_test_upgrade
 from .create_db import objective_test_upgrade
@@ -40,6 +55,7 @@ def test_init() -> None:
 
     assert storage.get_current_version() == storage.get_head_version()
     assert storage.get_all_versions() == [
+        "v3.6.0.a",
         "v3.2.0.a",
         "v3.0.0.d",
         "v3.0.0.c",
@@ -53,6 +69,16 @@ def test_init() -> None:
     ]
 
 
+def test_alembic_script_is_shared_across_storages() -> None:
+    storage1 = create_test_storage()
+    storage2 = create_test_storage()
+
+    script1 = storage1._version_manager._create_alembic_script()
+    script2 = storage2._version_manager._create_alembic_script()
+    assert script1 is script2
+    assert storage1.get_head_version() == storage2.get_head_version() == "v3.6.0.a"
+
+
 def test_init_url_template() -> None:
     with NamedTemporaryFilePool(suffix="{SCHEMA_VERSION}") as tf:
         storage = RDBStorage("sqlite:///" + tf.name)
@@ -73,6 +99,27 @@ def test_init_url_that_contains_percent_character() -> None:
         RDBStorage("sqlite:///" + tf.name)
 
 
+def test_init_skips_table_creation_for_existing_tables() -> None:
+    with NamedTemporaryFilePool() as tf:
+        url = "sqlite:///" + tf.name
+        metadata = BaseModel.metadata
+        with patch.object(metadata, "create_all", wraps=metadata.create_all) as create_all:
+            RDBStorage(url)
+            assert create_all.call_count == 1
+
+            RDBStorage(url)
+            assert create_all.call_count == 1
+
+
+def test_engine_is_disposed_with_storage() -> None:
+    with patch.object(Engine, "dispose") as dispose:
+        storage = create_test_storage()
+        dispose.assert_not_called()
+
+        del storage
+        dispose.assert_called_once()
+
+
 def test_init_db_module_import_error() -> None:
     expected_msg = (
         "Failed to import DB access module for the specified storage URL. "
@@ -114,6 +161,38 @@ def test_set_default_engine_kwargs_for_mysql_with_other_rdb() -> None:
     assert "pool_pre_ping" not in engine_kwargs
 
 
+@pytest.mark.parametrize(
+    "engine_kwargs,expected_connect_args",
+    [
+        ({}, {"check_same_thread": False}),
+        ({"connect_args": {"timeout": 10}}, {"check_same_thread": False, "timeout": 10}),
+        ({"connect_args": {"check_same_thread": True}}, {"check_same_thread": True}),
+    ],
+)
+def test_set_default_engine_kwargs_for_sqlite_with_null_pool(
+    engine_kwargs: Dict[str, Any], expected_connect_args: Dict[str, Any]
+) -> None:
+    # Emulate SQLAlchemy<2.0, which uses `NullPool` for file-based SQLite databases.
+    with patch.object(SQLiteDialect_pysqlite, "get_pool_class", return_value=NullPool):
+        RDBStorage._set_default_engine_kwargs_for_sqlite("sqlite:///example.db", engine_kwargs)
+    assert engine_kwargs["poolclass"] is QueuePool
+    assert engine_kwargs["connect_args"] == expected_connect_args
+
+
+def test_set_default_engine_kwargs_for_sqlite_with_other_pool() -> None:
+    # Do not change engine_kwargs if the pool class is given or the default one is not `NullPool`.
+    engine_kwargs: Dict[str, Any] = {"poolclass": NullPool}
+    with patch.object(SQLiteDialect_pysqlite, "get_pool_class", return_value=NullPool):
+        RDBStorage._set_default_engine_kwargs_for_sqlite("sqlite:///example.db", engine_kwargs)
+    assert engine_kwargs == {"poolclass": NullPool}
+
+    engine_kwargs = {}
+    with patch.object(SQLiteDialect_pysqlite, "get_pool_class", return_value=QueuePool):
+        RDBStorage._set_default_engine_kwargs_for_sqlite("sqlite:///example.db", engine_kwargs)
+    RDBStorage._set_default_engine_kwargs_for_sqlite("mysql://localhost", engine_kwargs)
+    assert engine_kwargs == {}
+
+
 def test_check_table_schema_compatibility() -> None:
     storage = create_test_storage()
     session = storage.scoped_session()
@@ -150,6 +229,223 @@ def test_create_scoped_session() -> None:
             session.add(v)
 
 
+def test_create_new_study_with_colliding_generated_name() -> None:
+    storage = create_test_storage()
+
+    uuids = [uuid.UUID(int=0), uuid.UUID(int=0), uuid.UUID(int=1)]
+    with patch("optuna.storages._rdb.storage.uuid.uuid4", side_effect=uuids):
+        study_id_1 = storage.create_new_study([StudyDirection.MINIMIZE])
+        study_id_2 = storage.create_new_study([StudyDirection.MINIMIZE])
+
+    assert storage.get_study_name_from_id(study_id_1) == DEFAULT_STUDY_NAME_PREFIX + str(uuids[0])
+    assert storage.get_study_name_from_id(study_id_2) == DEFAULT_STUDY_NAME_PREFIX + str(uuids[2])
+
+    # The retries are bounded even if every generated name collides.
+    with patch(
+        "optuna.storages._rdb.storage.uuid.uuid4", return_value=uuids[0]
+    ) as mock_uuid4, pytest.raises(IntegrityError):
+        storage.create_new_study([StudyDirection.MINIMIZE])
+    assert mock_uuid4.call_count == 4
+    assert len(storage.get_all_studies()) == 2
+
+
+def test_set_trial_param_without_upsert() -> None:
+    storage = create_test_storage()
+    study_id = storage.create_new_study([StudyDirection.MINIMIZE])
+    trial_id_1 = storage.create_new_trial(study_id)
+    trial_id_2 = storage.create_new_trial(study_id)
+
+    # Emulate a dialect that does not support `INSERT ... ON CONFLICT`.
+    with patch("optuna.storages._rdb.storage._create_upsert_statement", return_value=None):
+        storage.set_trial_param(trial_id_1, "x", 0.5, FloatDistribution(low=0.0, high=1.0))
+        storage.set_trial_param(trial_id_2, "x", 0.25, FloatDistribution(low=0.0, high=1.0))
+        storage.set_trial_param(trial_id_2, "x", 1.5, FloatDistribution(low=0.0, high=2.0))
+        with pytest.raises(ValueError):
+            storage.set_trial_param(trial_id_2, "x", 1, IntDistribution(low=0, high=1))
+        storage.set_trial_param(trial_id_2, "y", 0, CategoricalDistribution(["a"]))
+        with pytest.raises(ValueError):
+            storage.set_trial_param(trial_id_1, "y", 0, CategoricalDistribution(["a", "b"]))
+
+    assert storage.get_trial(trial_id_1).params == {"x": 0.5}
+    trial_2 = storage.get_trial(trial_id_2)
+    assert trial_2.params == {"x": 1.5, "y": "a"}
+    assert trial_2.distributions["x"] == FloatDistribution(low=0.0, high=2.0)
+
+
+def test_set_trial_intermediate_value_without_upsert() -> None:
+    storage = create_test_storage()
+    study_id = storage.create_new_study([StudyDirection.MINIMIZE])
+    trial_id = storage.create_new_trial(study_id)
+
+    # Emulate a dialect that does not support `INSERT ... ON CONFLICT`.
+    with patch("optuna.storages._rdb.storage._create_upsert_statement", return_value=None):
+        storage.set_trial_intermediate_value(trial_id, 0, 0.1)
+        storage.set_trial_intermediate_value(trial_id, 1, float("inf"))
+        storage.set_trial_intermediate_value(trial_id, 0, float("nan"))
+
+    intermediate_values = storage.get_trial(trial_id).intermediate_values
+    assert len(intermediate_values) == 2
+    assert math.isnan(intermediate_values[0])
+    assert intermediate_values[1] == float("inf")
+
+
+def test_create_new_trial_retries_on_operational_error() -> None:
+    storage = create_test_storage()
+    study_id = storage.create_new_study([StudyDirection.MINIMIZE])
+
+    get_prepared_new_trial = storage._get_prepared_new_trial
+    n_calls = 0
+
+    def _fail_once(*args: Any) -> Any:
+        nonlocal n_calls
+        n_calls += 1
+        if n_calls == 1:
+            raise OperationalError("statement", {}, Exception("database is locked"))
+        return get_prepared_new_trial(*args)
+
+    # The backoff jitter must not advance the global random sequence.
+    random.seed(0)
+    expected_random_value = random.random()
+    random.seed(0)
+    with patch.object(storage, "_get_prepared_new_trial", side_effect=_fail_once), patch(
+        "optuna.storages._rdb.storage.time.sleep"
+    ) as sleep:
+        trial_id = storage.create_new_trial(study_id)
+    assert random.random() == expected_random_value
+
+    assert n_calls == 2
+    assert sleep.call_count == 1
+    assert storage.get_trial(trial_id).number == 0
+    assert storage.get_n_trials(study_id) == 1
+
+    error = OperationalError("statement", {}, Exception("database is locked"))
+    with patch.object(storage, "_get_prepared_new_trial", side_effect=error), patch(
+        "optuna.storages._rdb.storage.time.sleep"
+    ) as sleep:
+        with pytest.raises(optuna.exceptions.StorageInternalError):
+            storage.create_new_trial(study_id)
+
+    assert sleep.call_count == 3
+    assert storage.get_n_trials(study_id) == 1
+
+
+def test_create_new_trial_with_template_trial_params() -> None:
+    storage = create_test_storage()
+    study_id = storage.create_new_study([StudyDirection.MINIMIZE])
+    trial_id = storage.create_new_trial(study_id)
+    storage.set_trial_param(trial_id, "x", 0.5, FloatDistribution(low=0.0, high=1.0))
+
+    template_trial = optuna.trial.create_trial(
+        params={"x": 0.25, "y": "a"},
+        distributions={
+            "x": FloatDistribution(low=0.0, high=2.0),
+            "y": CategoricalDistribution(["a", "b"]),
+        },
+        value=1.0,
+    )
+    trial = storage.get_trial(storage.create_new_trial(study_id, template_trial))
+    assert trial.params == template_trial.params
+    assert trial.distributions == template_trial.distributions
+
+    incompatible_template_trial = optuna.trial.create_trial(
+        params={"x": 1}, distributions={"x": IntDistribution(low=0, high=1)}, value=1.0
+    )
+    with pytest.raises(ValueError):
+        storage.create_new_trial(study_id, incompatible_template_trial)
+    assert storage.get_n_trials(study_id) == 2
+
+
+def test_distribution_json_is_decoded_once_per_storage() -> None:
+    with NamedTemporaryFilePool() as tf:
+        url = "sqlite:///" + tf.name
+        storage = RDBStorage(url)
+        study_id = storage.create_new_study([StudyDirection.MINIMIZE])
+        trial_ids = [storage.create_new_trial(study_id) for _ in range(3)]
+        for trial_id in trial_ids:
+            storage.set_trial_param(trial_id, "x", 0.5, FloatDistribution(low=0.0, high=1.0))
+
+        with patch(
+            "optuna.distributions.json_to_distribution", wraps=json_to_distribution
+        ) as mock_json_to_distribution:
+            storage.get_all_trials(study_id)
+            storage.get_trial(trial_ids[0])
+        assert mock_json_to_distribution.call_count == 1
+
+        # Decoded distributions are not shared with other storages.
+        other_storage = RDBStorage(url)
+        distribution = storage.get_trial(trial_ids[0]).distributions["x"]
+        other_distribution = other_storage.get_trial(trial_ids[0]).distributions["x"]
+        assert distribution == other_distribution
+        assert distribution is not other_distribution
+
+
+def test_get_trials_with_state_changed_during_read() -> None:
+    with NamedTemporaryFilePool() as tf:
+        url = "sqlite:///" + tf.name
+        storage = RDBStorage(url)
+        other_storage = RDBStorage(url)
+        study_id = storage.create_new_study([StudyDirection.MINIMIZE])
+        trial_id = storage.create_new_trial(study_id)
+        storage.set_trial_param(trial_id, "x", 0.5, FloatDistribution(low=0.0, high=1.0))
+        storage.set_trial_user_attr(trial_id, "a", 1)
+        storage.set_trial_intermediate_value(trial_id, 0, 0.1)
+
+        # Complete the trial from another connection right after the trial rows have been read.
+        completed = False
+
+        def _complete_trial_before_reading_params(
+            conn: Any, cursor: Any, statement: str, *args: Any
+        ) -> None:
+            nonlocal completed
+            if not completed and "FROM trial_params" in statement:
+                completed = True
+                other_storage.set_trial_state_values(trial_id, TrialState.COMPLETE, [0.0])
+
+        event.listen(
+            storage.engine, "before_cursor_execute", _complete_trial_before_reading_params
+        )
+        trials = storage.get_all_trials(study_id, states=(TrialState.RUNNING,))
+        event.remove(
+            storage.engine, "before_cursor_execute", _complete_trial_before_reading_params
+        )
+
+        assert completed
+        assert other_storage.get_trial(trial_id).state == TrialState.COMPLETE
+
+        assert len(trials) == 1
+        assert trials[0].state == TrialState.RUNNING
+        assert trials[0].params == {"x": 0.5}
+        assert trials[0].user_attrs == {"a": 1}
+        assert trials[0].intermediate_values == {0: 0.1}
+
+
+def test_get_param_values() -> None:
+    storage = create_test_storage()
+    study_id = storage.create_new_study([StudyDirection.MINIMIZE])
+    other_study_id = storage.create_new_study([StudyDirection.MINIMIZE])
+    distribution = FloatDistribution(low=0.0, high=10.0)
+
+    trial_ids = [storage.create_new_trial(study_id) for _ in range(3)]
+    for trial_id, value in zip(trial_ids, [1.0, 2.5, 4.0]):
+        storage.set_trial_param(trial_id, "x", value, distribution)
+    storage.set_trial_param(trial_ids[0], "y", 3.0, distribution)
+    storage.set_trial_state_values(trial_ids[1], TrialState.COMPLETE, [0.0])
+    other_trial_id = storage.create_new_trial(other_study_id)
+    storage.set_trial_param(other_trial_id, "x", 5.0, distribution)
+
+    values = storage.get_param_values(study_id, "x")
+    assert values.dtype == np.float64
+    np.testing.assert_array_equal(values, [1.0, 2.5, 4.0])
+    np.testing.assert_array_equal(storage.get_param_values(study_id, "y"), [3.0])
+    np.testing.assert_array_equal(
+        storage.get_param_values(study_id, "x", states=(TrialState.COMPLETE,)), [2.5]
+    )
+    assert len(storage.get_param_values(study_id, "z")) == 0
+
+    with pytest.raises(KeyError):
+        storage.get_param_values(study_id + other_study_id + 1, "x")
+
+
 def test_upgrade_identity() -> None:
     storage = create_test_storage()
 
@@ -1,5 +1,6 @@
 from unittest.mock import patch
 
+import numpy as np
 import pytest
 
 import optuna
@@ -48,6 +49,26 @@ def test_set_trial_state_values() -> None:
     assert cached_trial == base_trial
 
 
+def test_cached_study_name() -> None:
+    base_storage = RDBStorage("sqlite:///:memory:")
+    base_storage.create_new_study(directions=[StudyDirection.MINIMIZE], study_name="test-study")
+    storage = _CachedStorage(base_storage)
+
+    study_id = storage.get_study_id_from_name("test-study")
+    with patch.object(base_storage, "get_study_name_from_id") as get_mock:
+        assert storage.get_study_name_from_id(study_id) == "test-study"
+        assert get_mock.call_count == 0
+
+
+def test_get_param_values() -> None:
+    study = optuna.create_study(storage="sqlite:///:memory:")
+    study.optimize(lambda t: t.suggest_float("x", 0.0, 1.0), n_trials=3)
+    assert isinstance(study._storage, _CachedStorage)
+
+    values = study._storage.get_param_values(study._study_id, "x")
+    np.testing.assert_array_equal(values, [t.params["x"] for t in study.trials])
+
+
 def test_uncached_set() -> None:
     """Test CachedStorage does flush to persistent storages.
 